@@ -77,6 +77,11 @@ export class CloudQueryController {
         containerEnv.AWS_SESSION_TOKEN = credentials.sessionToken;
       }
 
+      // Set PAYLOAD_ENCODING=columnar to upload scans in the compact columnar format
+      if (process.env.PAYLOAD_ENCODING) {
+        containerEnv.PAYLOAD_ENCODING = process.env.PAYLOAD_ENCODING;
+      }
+
       // Pass encrypted credentials to container
       const containerId = await this.dockerService.runContainer(
         process.env.QUERY_IMAGE || "query-runner:debug",
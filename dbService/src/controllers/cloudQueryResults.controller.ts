@@ -2,7 +2,8 @@ import { Request, Response } from 'express';
 import neo4j, { Session } from 'neo4j-driver';
 import { Neo4jService } from '../services/neo4j.service';
 import { ConnectivityVerifier } from '../services/connectivityVerifier';
-import { CloudQueryResult } from '@/types/cloudQuery.types';
+import { CloudQueryResult, PartialCloudQueryResult } from '@/types/cloudQuery.types';
+import { COLUMNAR_CONTENT_TYPE, encodeColumnar } from '@/utils/columnar';
 
 // Add interface for authenticated request
 interface AuthenticatedRequest extends Request {
@@ -768,6 +769,375 @@ export const processCloudQueryResults = async (req: Request, res: Response) => {
     }
 };
 
+// Node label and ID property for each resource ID prefix a targeted rescan can refresh.
+// NAT gateways, Elastic IPs and transit gateways are not stored in the graph.
+const PARTIAL_RESOURCE_NODES: Record<string, { label: string; idProp: string }> = {
+    'i-': { label: 'Instance', idProp: 'instanceId' },
+    'vpc-': { label: 'VPC', idProp: 'vpcId' },
+    'subnet-': { label: 'Subnet', idProp: 'subnetId' },
+    'sg-': { label: 'SecurityGroup', idProp: 'groupId' },
+    'rtb-': { label: 'RouteTable', idProp: 'routeTableId' },
+    'igw-': { label: 'InternetGateway', idProp: 'internetGatewayId' },
+    'acl-': { label: 'NetworkAcl', idProp: 'networkAclId' }
+};
+
+function partialResourceNode(resourceId: string) {
+    if (resourceId.startsWith('arn:') && resourceId.includes(':elasticloadbalancing:')) {
+        return { id: resourceId, label: 'LoadBalancer', idProp: 'loadBalancerArn' };
+    }
+    // arn:aws:ec2:<region>:<account>:<type>/<id>
+    const id = resourceId.startsWith('arn:') && resourceId.includes(':ec2:')
+        ? resourceId.substring(resourceId.lastIndexOf('/') + 1)
+        : resourceId;
+    const prefix = Object.keys(PARTIAL_RESOURCE_NODES).find(p => id.startsWith(p));
+    return prefix ? { id, ...PARTIAL_RESOURCE_NODES[prefix] } : null;
+}
+
+export const processPartialCloudQueryResults = async (req: Request, res: Response) => {
+    let session: Session | null = null;
+
+    try {
+        const { userId, connectionId, resourceIds, data }: PartialCloudQueryResult = req.body;
+
+        // Validate required fields
+        if (!userId || !connectionId || !data || !Array.isArray(resourceIds) || resourceIds.length === 0) {
+            return res.status(400).json({ error: 'Missing required fields' });
+        }
+
+        session = Neo4jService.getSession();
+        const tx = session.beginTransaction();
+        const params = { userId, connectionId };
+
+        // Resources that were rescanned but no longer exist are removed with their
+        // rules, routes and entries. Nothing else of this connection is deleted.
+        const returnedIds = new Set<string>([
+            ...(data.vpcs || []).map(vpc => vpc.VpcId),
+            ...(data.subnets || []).map(subnet => subnet.SubnetId),
+            ...(data.instances || []).map(instance => instance.InstanceId),
+            ...(data.security_groups || []).map(sg => sg.GroupId),
+            ...(data.route_tables || []).map(rt => rt.RouteTableId),
+            ...(data.internet_gateways || []).map(igw => igw.InternetGatewayId),
+            ...(data.network_acls || []).map(acl => acl.NetworkAclId),
+            ...(data.load_balancers || []).map(lb => lb.LoadBalancerArn)
+        ]);
+        for (const resourceId of resourceIds) {
+            const node = partialResourceNode(resourceId);
+            if (!node || returnedIds.has(node.id)) {
+                continue;
+            }
+            await tx.run(
+                `MATCH (n:${node.label} {${node.idProp}: $id, userId: $userId, connectionId: $connectionId})
+                 OPTIONAL MATCH (n)-[:HAS_RULE|HAS_ROUTE|HAS_ENTRY]->(child)
+                 DETACH DELETE child, n`,
+                { id: node.id, ...params }
+            );
+        }
+
+        // Rescanned resources are merged in place so relationships other resources
+        // hold to them survive; only the relationships derived from their own data
+        // are dropped and recreated.
+        for (const vpc of data.vpcs || []) {
+            await tx.run(
+                `MERGE (v:VPC {vpcId: $vpcId, userId: $userId, connectionId: $connectionId})
+                 SET v += $properties`,
+                { vpcId: vpc.VpcId, properties: vpc, ...params }
+            );
+        }
+
+        for (const subnet of data.subnets || []) {
+            await tx.run(
+                `MERGE (s:Subnet {subnetId: $subnetId, userId: $userId, connectionId: $connectionId})
+                 SET s += $properties
+                 WITH s
+                 OPTIONAL MATCH (:VPC)-[c:CONTAINS]->(s)
+                 DELETE c
+                 WITH DISTINCT s
+                 MATCH (v:VPC {vpcId: $vpcId, userId: $userId, connectionId: $connectionId})
+                 CREATE (v)-[:CONTAINS]->(s)`,
+                { subnetId: subnet.SubnetId, vpcId: subnet.VpcId, properties: subnet, ...params }
+            );
+        }
+
+        for (const instance of data.instances || []) {
+            await tx.run(
+                `MERGE (i:Instance {instanceId: $instanceId, userId: $userId, connectionId: $connectionId})
+                 SET i += $properties
+                 WITH i
+                 OPTIONAL MATCH (i)-[b:BELONGS_TO]->(:Subnet)
+                 DELETE b`,
+                {
+                    instanceId: instance.InstanceId,
+                    properties: {
+                        instanceType: instance.InstanceType,
+                        vpcId: instance.VpcId,
+                        subnetId: instance.SubnetId,
+                        imageId: instance.ImageId,
+                        imageName: instance.ImageName,
+                        imageDescription: instance.ImageDescription,
+                        imageCreationDate: instance.ImageCreationDate
+                    },
+                    ...params
+                }
+            );
+            if (instance.SubnetId) {
+                await tx.run(
+                    `MATCH (i:Instance {instanceId: $instanceId, userId: $userId, connectionId: $connectionId})
+                     MATCH (s:Subnet {subnetId: $subnetId, userId: $userId, connectionId: $connectionId})
+                     CREATE (i)-[:BELONGS_TO]->(s)`,
+                    { instanceId: instance.InstanceId, subnetId: instance.SubnetId, ...params }
+                );
+            }
+        }
+
+        for (const sg of data.security_groups || []) {
+            await tx.run(
+                `MERGE (sg:SecurityGroup {groupId: $groupId, userId: $userId, connectionId: $connectionId})
+                 SET sg += $properties
+                 WITH sg
+                 OPTIONAL MATCH (sg)-[:HAS_RULE]->(r:SecurityGroupRule)
+                 DETACH DELETE r
+                 WITH DISTINCT sg
+                 OPTIONAL MATCH (:VPC)-[h:HAS]->(sg)
+                 DELETE h`,
+                {
+                    groupId: sg.GroupId,
+                    properties: {
+                        groupName: sg.GroupName,
+                        vpcId: sg.VpcId,
+                        description: sg.Description
+                    },
+                    ...params
+                }
+            );
+
+            const rules: [string, typeof sg.InboundRules][] = [['inbound', sg.InboundRules], ['outbound', sg.OutboundRules]];
+            for (const [type, typeRules] of rules) {
+                for (const rule of typeRules || []) {
+                    await tx.run(
+                        `MATCH (sg:SecurityGroup {groupId: $groupId, userId: $userId, connectionId: $connectionId})
+                         CREATE (r:SecurityGroupRule {ruleId: $ruleId, userId: $userId, connectionId: $connectionId})
+                         SET r += $properties
+                         CREATE (sg)-[:HAS_RULE {type: $type}]->(r)`,
+                        {
+                            groupId: sg.GroupId,
+                            ruleId: `${sg.GroupId}-${type}-${rule.IpProtocol}-${rule.FromPort}-${rule.ToPort}`,
+                            type,
+                            properties: {
+                                ipProtocol: rule.IpProtocol,
+                                fromPort: rule.FromPort,
+                                toPort: rule.ToPort,
+                                userIdGroupPairs: rule.UserIdGroupPairs.map((pair: UserGroupPair) => `${pair.UserId}:${pair.GroupId}`),
+                                ipRanges: rule.IpRanges.map((range: IpRange) => range.CidrIp),
+                                ipv6Ranges: rule.Ipv6Ranges.map((range: Ipv6Range) => range.CidrIpv6),
+                                prefixListIds: rule.PrefixListIds.map((pl: PrefixListId) => pl.PrefixListId)
+                            },
+                            ...params
+                        }
+                    );
+                }
+            }
+
+            if (sg.VpcId) {
+                await tx.run(
+                    `MATCH (v:VPC {vpcId: $vpcId, userId: $userId, connectionId: $connectionId})
+                     MATCH (sg:SecurityGroup {groupId: $groupId, userId: $userId, connectionId: $connectionId})
+                     CREATE (v)-[:HAS]->(sg)`,
+                    { vpcId: sg.VpcId, groupId: sg.GroupId, ...params }
+                );
+            }
+        }
+
+        for (const rt of data.route_tables || []) {
+            await tx.run(
+                `MERGE (rt:RouteTable {routeTableId: $routeTableId, userId: $userId, connectionId: $connectionId})
+                 SET rt += $properties
+                 WITH rt
+                 OPTIONAL MATCH (rt)-[:HAS_ROUTE]->(r:Route)
+                 DETACH DELETE r
+                 WITH DISTINCT rt
+                 OPTIONAL MATCH (rt)<-[rel:ASSOCIATED_WITH|HAS]-()
+                 DELETE rel`,
+                { routeTableId: rt.RouteTableId, properties: { vpcId: rt.VpcId }, ...params }
+            );
+
+            for (const route of rt.Routes || []) {
+                await tx.run(
+                    `MATCH (rt:RouteTable {routeTableId: $routeTableId, userId: $userId, connectionId: $connectionId})
+                     CREATE (r:Route {routeId: $routeId, userId: $userId, connectionId: $connectionId})
+                     SET r += $properties
+                     CREATE (rt)-[:HAS_ROUTE]->(r)`,
+                    {
+                        routeTableId: rt.RouteTableId,
+                        routeId: `${rt.RouteTableId}-${route.DestinationCidrBlock}`,
+                        properties: {
+                            destinationCidrBlock: route.DestinationCidrBlock,
+                            gatewayId: route.GatewayId,
+                            origin: route.Origin,
+                            state: route.State
+                        },
+                        ...params
+                    }
+                );
+            }
+
+            for (const assoc of rt.Associations || []) {
+                if (assoc.SubnetId) {
+                    await tx.run(
+                        `MATCH (rt:RouteTable {routeTableId: $routeTableId, userId: $userId, connectionId: $connectionId})
+                         MATCH (s:Subnet {subnetId: $subnetId, userId: $userId, connectionId: $connectionId})
+                         CREATE (s)-[:ASSOCIATED_WITH {associationId: $associationId, main: $main, state: $state}]->(rt)`,
+                        {
+                            routeTableId: rt.RouteTableId,
+                            subnetId: assoc.SubnetId,
+                            associationId: assoc.RouteTableAssociationId,
+                            main: assoc.Main,
+                            state: assoc.AssociationState.State,
+                            ...params
+                        }
+                    );
+                }
+            }
+
+            if (rt.VpcId) {
+                await tx.run(
+                    `MATCH (v:VPC {vpcId: $vpcId, userId: $userId, connectionId: $connectionId})
+                     MATCH (rt:RouteTable {routeTableId: $routeTableId, userId: $userId, connectionId: $connectionId})
+                     CREATE (v)-[:HAS]->(rt)`,
+                    { vpcId: rt.VpcId, routeTableId: rt.RouteTableId, ...params }
+                );
+            }
+        }
+
+        if (data.internet_gateways) {
+            await tx.run(
+                `MERGE (g:GlobalInternet {name: 'Internet'})`
+            );
+        }
+        for (const igw of data.internet_gateways || []) {
+            await tx.run(
+                `MERGE (igw:InternetGateway {internetGatewayId: $internetGatewayId, userId: $userId, connectionId: $connectionId})
+                 WITH igw
+                 MATCH (g:GlobalInternet {name: 'Internet'})
+                 MERGE (igw)-[:CONNECTS_TO]->(g)
+                 WITH igw
+                 OPTIONAL MATCH (igw)-[a:ATTACHED_TO]->(:VPC)
+                 DELETE a`,
+                { internetGatewayId: igw.InternetGatewayId, ...params }
+            );
+
+            for (const attachment of igw.Attachments || []) {
+                if (attachment.VpcId) {
+                    await tx.run(
+                        `MATCH (igw:InternetGateway {internetGatewayId: $internetGatewayId, userId: $userId, connectionId: $connectionId})
+                         MATCH (v:VPC {vpcId: $vpcId, userId: $userId, connectionId: $connectionId})
+                         CREATE (igw)-[:ATTACHED_TO {state: $state}]->(v)`,
+                        {
+                            internetGatewayId: igw.InternetGatewayId,
+                            vpcId: attachment.VpcId,
+                            state: attachment.State,
+                            ...params
+                        }
+                    );
+                }
+            }
+        }
+
+        for (const acl of data.network_acls || []) {
+            await tx.run(
+                `MERGE (acl:NetworkAcl {networkAclId: $networkAclId, userId: $userId, connectionId: $connectionId})
+                 SET acl += $properties
+                 WITH acl
+                 OPTIONAL MATCH (acl)-[:HAS_ENTRY]->(e:NetworkAclEntry)
+                 DETACH DELETE e
+                 WITH DISTINCT acl
+                 OPTIONAL MATCH (:VPC)-[h:HAS]->(acl)
+                 DELETE h`,
+                { networkAclId: acl.NetworkAclId, properties: { vpcId: acl.VpcId }, ...params }
+            );
+
+            for (const entry of acl.Entries || []) {
+                await tx.run(
+                    `MATCH (acl:NetworkAcl {networkAclId: $networkAclId, userId: $userId, connectionId: $connectionId})
+                     CREATE (e:NetworkAclEntry {entryId: $entryId, userId: $userId, connectionId: $connectionId})
+                     SET e += $properties
+                     CREATE (acl)-[:HAS_ENTRY {direction: $direction}]->(e)`,
+                    {
+                        networkAclId: acl.NetworkAclId,
+                        entryId: `${acl.NetworkAclId}-${entry.RuleNumber}-${entry.Egress}`,
+                        direction: entry.Egress ? "egress" : "ingress",
+                        properties: {
+                            cidrBlock: entry.CidrBlock,
+                            protocol: entry.Protocol,
+                            ruleAction: entry.RuleAction,
+                            ruleNumber: entry.RuleNumber
+                        },
+                        ...params
+                    }
+                );
+            }
+
+            if (acl.VpcId) {
+                await tx.run(
+                    `MATCH (v:VPC {vpcId: $vpcId, userId: $userId, connectionId: $connectionId})
+                     MATCH (acl:NetworkAcl {networkAclId: $networkAclId, userId: $userId, connectionId: $connectionId})
+                     CREATE (v)-[:HAS]->(acl)`,
+                    { vpcId: acl.VpcId, networkAclId: acl.NetworkAclId, ...params }
+                );
+            }
+        }
+
+        for (const lb of data.load_balancers || []) {
+            await tx.run(
+                `MERGE (lb:LoadBalancer {loadBalancerArn: $loadBalancerArn, userId: $userId, connectionId: $connectionId})
+                 SET lb += $properties
+                 WITH lb
+                 OPTIONAL MATCH (lb)-[rel:DEPLOYED_IN|ROUTED_THROUGH]->()
+                 DELETE rel`,
+                {
+                    loadBalancerArn: lb.LoadBalancerArn,
+                    properties: {
+                        loadBalancerName: lb.LoadBalancerName,
+                        type: lb.Type,
+                        scheme: lb.Scheme
+                    },
+                    ...params
+                }
+            );
+
+            if (lb.VpcId) {
+                await tx.run(
+                    `MATCH (v:VPC {vpcId: $vpcId, userId: $userId, connectionId: $connectionId})
+                     MATCH (lb:LoadBalancer {loadBalancerArn: $loadBalancerArn, userId: $userId, connectionId: $connectionId})
+                     CREATE (lb)-[:DEPLOYED_IN]->(v)`,
+                    { vpcId: lb.VpcId, loadBalancerArn: lb.LoadBalancerArn, ...params }
+                );
+
+                if (lb.Scheme === 'internet-facing') {
+                    await tx.run(
+                        `MATCH (lb:LoadBalancer {loadBalancerArn: $loadBalancerArn, userId: $userId, connectionId: $connectionId})
+                         MATCH (v:VPC {vpcId: $vpcId, userId: $userId, connectionId: $connectionId})
+                         MATCH (igw:InternetGateway {userId: $userId, connectionId: $connectionId})-[:ATTACHED_TO]->(v)
+                         CREATE (lb)-[:ROUTED_THROUGH]->(igw)`,
+                        { loadBalancerArn: lb.LoadBalancerArn, vpcId: lb.VpcId, ...params }
+                    );
+                }
+            }
+        }
+
+        // CAN_CONNECT results need the whole inventory, so they are left to the next full scan
+        await tx.commit();
+
+        res.status(200).json({ message: 'Partial results processed successfully' });
+    } catch (error) {
+        console.error('Error processing partial CloudQuery results:', error);
+        res.status(500).json({ error: 'Failed to process results' });
+    } finally {
+        if (session) {
+            await session.close();
+        }
+    }
+};
+
 export const getTerraformInfrastructureData = async (req: Request, res: Response) => {
     let session: Session | null = null;
     
@@ -1041,6 +1411,10 @@ export const getTerraformInfrastructureData = async (req: Request, res: Response
         infrastructure.networkAcls = Array.from(networkAclsMap.values());
         infrastructure.loadBalancers = Array.from(loadBalancersMap.values());
 
+        // Readers that ask for the columnar encoding get it; everyone else gets plain JSON
+        if (req.accepts(['application/json', COLUMNAR_CONTENT_TYPE]) === COLUMNAR_CONTENT_TYPE) {
+            return res.status(200).type(COLUMNAR_CONTENT_TYPE).send(JSON.stringify(encodeColumnar(infrastructure)));
+        }
         res.status(200).json(infrastructure);
     } catch (error) {
         console.error('Error fetching Terraform infrastructure data:', error);
@@ -1,10 +1,12 @@
-import { Router } from 'express';
-import { processCloudQueryResults, getInfrastructureData, getTerraformInfrastructureData, getInfrastructureDataWithUserId } from '../controllers/cloudQueryResults.controller';
+import express, { Router } from 'express';
+import { processCloudQueryResults, processPartialCloudQueryResults, getInfrastructureData, getTerraformInfrastructureData, getInfrastructureDataWithUserId } from '../controllers/cloudQueryResults.controller';
 import authentification from '@/shared/authMiddleware';
+import { COLUMNAR_CONTENT_TYPE, decodeColumnarBody } from '@/utils/columnar';
 
 const router = Router();
 
-router.post('/cloud-query-results', processCloudQueryResults);
+router.post('/cloud-query-results', express.json({ type: COLUMNAR_CONTENT_TYPE }), decodeColumnarBody, processCloudQueryResults);
+router.post('/cloud-query-results/partial', express.json({ type: COLUMNAR_CONTENT_TYPE }), decodeColumnarBody, processPartialCloudQueryResults);
 router.get('/cloud-query-results/:userId/:connectionId', getInfrastructureDataWithUserId);
 router.get('/tf-query-results/:userId/:connectionId', getTerraformInfrastructureData);
 router.get('/visualization/:connectionId', authentification, getInfrastructureData);
@@ -120,4 +120,9 @@ export interface CloudQueryResult {
             State: string;
         }>;
     };
-} 
\ No newline at end of file
+}
+
+// Targeted rescan: only the listed resources are replaced, the rest of the graph is kept
+export interface PartialCloudQueryResult extends CloudQueryResult {
+    resourceIds: string[];
+}
@@ -0,0 +1,100 @@
+import { Request, Response, NextFunction } from 'express';
+
+// Column-oriented encoding of resource inventories. Every resource type becomes
+// a table of columns, and string columns (IDs, ARNs, names) point into one
+// shared string table instead of repeating the same keys and values per row.
+// A column's optional "missing" list names the rows that did not have that key,
+// so decoding reproduces the original rows exactly rather than adding nulls.
+// Must stay in sync with the Python codec in the query image and terraformService.
+export const COLUMNAR_CONTENT_TYPE = 'application/vnd.aurora.columnar+json';
+export const COLUMNAR_FORMAT = 'columnar/1';
+
+interface ColumnarColumn {
+    name: string;
+    kind: 'str' | 'json';
+    values: any[];
+    missing?: number[];
+}
+
+type ColumnarTable = { count: number; columns: ColumnarColumn[] } | { rows: any };
+
+export interface ColumnarPayload {
+    format: string;
+    strings: string[];
+    tables: Record<string, ColumnarTable>;
+}
+
+export const encodeColumnar = (data: object): ColumnarPayload => {
+    const strings: string[] = [];
+    const stringIndex = new Map<string, number>();
+    const intern = (value: string): number => {
+        let index = stringIndex.get(value);
+        if (index === undefined) {
+            index = strings.length;
+            strings.push(value);
+            stringIndex.set(value, index);
+        }
+        return index;
+    };
+
+    const tables: Record<string, ColumnarTable> = {};
+    for (const [resourceType, rows] of Object.entries(data)) {
+        if (!Array.isArray(rows) || !rows.every(row => row && typeof row === 'object' && !Array.isArray(row))) {
+            tables[resourceType] = { rows };
+            continue;
+        }
+        const names = Array.from(new Set(rows.flatMap(row => Object.keys(row))));
+        const columns = names.map((name): ColumnarColumn => {
+            const values = rows.map(row => row[name] ?? null);
+            const column: ColumnarColumn = values.every(value => value === null || typeof value === 'string')
+                ? { name, kind: 'str', values: values.map(value => value === null ? null : intern(value)) }
+                : { name, kind: 'json', values };
+            const missing = rows.flatMap((row, i) => name in row ? [] : [i]);
+            if (missing.length > 0) {
+                column.missing = missing;
+            }
+            return column;
+        });
+        tables[resourceType] = { count: rows.length, columns };
+    }
+
+    return { format: COLUMNAR_FORMAT, strings, tables };
+};
+
+export const decodeColumnar = (payload: ColumnarPayload): Record<string, any> => {
+    if (payload.format !== COLUMNAR_FORMAT) {
+        throw new Error(`Unsupported columnar format: ${payload.format}`);
+    }
+    const data: Record<string, any> = {};
+    for (const [resourceType, table] of Object.entries(payload.tables)) {
+        if ('rows' in table) {
+            data[resourceType] = table.rows;
+            continue;
+        }
+        const rows: Record<string, any>[] = Array.from({ length: table.count }, () => ({}));
+        for (const column of table.columns) {
+            const missing = new Set(column.missing ?? []);
+            column.values.forEach((value, i) => {
+                if (missing.has(i)) {
+                    return;
+                }
+                rows[i][column.name] = column.kind === 'str' && value !== null ? payload.strings[value] : value;
+            });
+        }
+        data[resourceType] = rows;
+    }
+    return data;
+};
+
+// Turns a columnar request body back into the row-oriented shape controllers expect
+export const decodeColumnarBody = (req: Request, res: Response, next: NextFunction) => {
+    if (!req.is(COLUMNAR_CONTENT_TYPE)) {
+        return next();
+    }
+    try {
+        req.body.data = decodeColumnar(req.body.data);
+        next();
+    } catch (error) {
+        return res.status(400).json({ error: 'Invalid columnar payload' });
+    }
+};
@@ -1,11 +1,68 @@
 import os
+import sys
 import json
-import boto3
+import time
+import uuid
+import shutil
+import hmac
 import hashlib
-import requests
-from Crypto.Cipher import AES
-from Crypto.Util.Padding import unpad
+import importlib
+import threading
 from datetime import datetime
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# boto3, botocore, requests and Crypto are imported on first use through
+# lazy_import() so short scans do not pay for modules they never touch.
+
+# Opt-in startup profile: STARTUP_PROFILE=1 prints where time goes before the
+# first AWS API call, STARTUP_BENCHMARK=1 stops right after that call.
+STARTUP_PROFILE = os.getenv("STARTUP_PROFILE") == "1" or os.getenv("STARTUP_BENCHMARK") == "1"
+_profile_marks = []
+_first_api_call = {}
+
+def process_uptime():
+    """Seconds since the interpreter process started, including its own startup."""
+    try:
+        with open("/proc/self/stat", "r") as file:
+            start_ticks = int(file.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime", "r") as file:
+            uptime = float(file.read().split()[0])
+        return uptime - start_ticks / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError):
+        return None
+
+@contextmanager
+def profiled(label):
+    """Records how long the wrapped block took when startup profiling is on."""
+    if not STARTUP_PROFILE:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _profile_marks.append((label, time.perf_counter() - start))
+
+def lazy_import(module_name):
+    """Imports a heavy module on first use, timing only that first import when profiling."""
+    module = sys.modules.get(module_name)
+    if module is not None:
+        return module
+    with profiled(f"import {module_name}"):
+        return importlib.import_module(module_name)
+
+def record_first_api_call(**kwargs):
+    if "uptime" not in _first_api_call:
+        _first_api_call["uptime"] = process_uptime()
+
+def print_startup_profile():
+    print("Startup profile:")
+    for label, elapsed in _profile_marks:
+        print(f"  {label:<32} {elapsed * 1000:8.1f} ms")
+    if _first_api_call.get("uptime") is not None:
+        print(f"  {'time to first API call':<32} {_first_api_call['uptime'] * 1000:8.1f} ms (since process start)")
 
 def decrypt(encrypted_text):
     # Get encryption key from environment variable
@@ -22,6 +79,8 @@ def decrypt(encrypted_text):
     encrypted_data = bytes.fromhex(encrypted_hex)
 
     # Create cipher and decrypt
+    AES = lazy_import("Crypto.Cipher.AES")
+    unpad = lazy_import("Crypto.Util.Padding").unpad
     cipher = AES.new(key, AES.MODE_CBC, iv)
     decrypted_data = cipher.decrypt(encrypted_data)
     
@@ -33,16 +92,53 @@ def decrypt(encrypted_text):
 # Decrypt and set credentials at startup
 def setup_credentials():
     # Decrypt credentials
-    access_key_id = decrypt(os.getenv("AWS_ACCESS_KEY_ID"))
-    secret_access_key = decrypt(os.getenv("AWS_SECRET_ACCESS_KEY"))
+    with profiled("decrypt credentials"):
+        access_key_id = decrypt(os.getenv("AWS_ACCESS_KEY_ID"))
+        secret_access_key = decrypt(os.getenv("AWS_SECRET_ACCESS_KEY"))
     
     # Set decrypted credentials as environment variables
     os.environ["AWS_ACCESS_KEY_ID"] = access_key_id
     os.environ["AWS_SECRET_ACCESS_KEY"] = secret_access_key
 
-def get_aws_session():
-    """Creates a session using AWS credentials from environment variables."""
-    return boto3.Session(region_name=os.getenv("AWS_REGION", "us-east-1"))
+class ClientCachingSession:
+    """Wraps a boto3 session so each service client is built once per scan."""
+
+    def __init__(self, session):
+        self._session = session
+        self._clients = {}
+        self._lock = threading.Lock()
+        self._shared = {}
+        self._shared_lock = threading.Lock()
+
+    def client(self, service_name):
+        with self._lock:
+            if service_name not in self._clients:
+                self._clients[service_name] = self._session.client(service_name)
+            return self._clients[service_name]
+
+    def shared(self, key, loader):
+        """Result of loader(), computed once per scan and shared between collectors."""
+        with self._shared_lock:
+            if key not in self._shared:
+                self._shared[key] = loader()
+            return self._shared[key]
+
+def get_aws_session(credentials=None, botocore_session=None):
+    """Creates a session using the given AWS credentials, or the environment's if none are given."""
+    boto3 = lazy_import("boto3")
+    if credentials is None:
+        session = boto3.Session(region_name=os.getenv("AWS_REGION", "us-east-1"))
+    else:
+        session = boto3.Session(
+            aws_access_key_id=credentials["accessKeyId"],
+            aws_secret_access_key=credentials["secretAccessKey"],
+            aws_session_token=credentials.get("sessionToken"),
+            region_name=credentials.get("region") or os.getenv("AWS_REGION", "us-east-1"),
+            botocore_session=botocore_session
+        )
+    if STARTUP_PROFILE:
+        session.events.register("before-send", record_first_api_call)
+    return ClientCachingSession(session)
 
 def convert_datetime(obj):
     """Recursively convert datetime objects to ISO format strings."""
@@ -54,20 +150,68 @@ def convert_datetime(obj):
         return obj.isoformat()
     return obj
 
-def send_results_to_db(results):
-    """Sends the results to the database controller."""
+def resolve_upload_target(user_id=None, connection_id=None):
+    """Returns the database URL, user ID and connection ID a scan is sent to."""
     db_url = os.getenv("DB_SERVICE_URL")
     if not db_url:
         raise ValueError("DB_SERVICE_URL environment variable is not set")
 
-    user_id = os.getenv("userID")
-    connection_id = os.getenv("CONNECTION_ID")
+    user_id = user_id or os.getenv("userID")
+    connection_id = connection_id or os.getenv("CONNECTION_ID")
 
     if not user_id:
         raise ValueError("userID environment variable is not set")
     if not connection_id:
         raise ValueError("CONNECTION_ID environment variable is not set")
 
+    return db_url, user_id, connection_id
+
+# Column-oriented payload encoding, decoded by the dbService and terraformService
+# codecs: string columns (IDs, ARNs, names) point into one shared string table.
+COLUMNAR_CONTENT_TYPE = "application/vnd.aurora.columnar+json"
+COLUMNAR_FORMAT = "columnar/1"
+
+def encode_columnar(data):
+    """Encodes {resource type: [rows]} as per-type column tables plus a string table."""
+    strings = []
+    string_index = {}
+
+    def intern(value):
+        if value not in string_index:
+            string_index[value] = len(strings)
+            strings.append(value)
+        return string_index[value]
+
+    tables = {}
+    for resource_type, rows in data.items():
+        if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+            tables[resource_type] = {"rows": rows}
+            continue
+        names = list(dict.fromkeys(name for row in rows for name in row))
+        columns = []
+        for name in names:
+            values = [row.get(name) for row in rows]
+            if all(value is None or isinstance(value, str) for value in values):
+                column = {
+                    "name": name,
+                    "kind": "str",
+                    "values": [None if value is None else intern(value) for value in values]
+                }
+            else:
+                column = {"name": name, "kind": "json", "values": values}
+            # Rows without the key are listed so decoders leave it out instead of adding null
+            missing = [index for index, row in enumerate(rows) if name not in row]
+            if missing:
+                column["missing"] = missing
+            columns.append(column)
+        tables[resource_type] = {"count": len(rows), "columns": columns}
+
+    return {"format": COLUMNAR_FORMAT, "strings": strings, "tables": tables}
+
+def send_results_to_db(results, user_id=None, connection_id=None, resource_ids=None):
+    """Sends the results to the database controller, as a partial update when resource_ids is given."""
+    db_url, user_id, connection_id = resolve_upload_target(user_id, connection_id)
+
     # Convert datetime objects
     safe_results = convert_datetime(results)
 
@@ -77,12 +221,33 @@ def send_results_to_db(results):
         "data": safe_results
     }
 
+    # Partial updates go to their own route so a receiver that only knows full
+    # replacement rejects them instead of wiping everything not in the payload
+    results_path = "/cloud-query-results"
+    if resource_ids is not None:
+        payload["resourceIds"] = resource_ids
+        results_path = os.getenv("PARTIAL_RESULTS_PATH", "/cloud-query-results/partial")
+
+    requests = lazy_import("requests")
     try:
-        response = requests.post(
-            f"{db_url}/cloud-query-results",
-            json=payload,
-            headers={"Content-Type": "application/json"}
-        )
+        response = None
+        if os.getenv("PAYLOAD_ENCODING") == "columnar":
+            columnar_payload = dict(payload, data=encode_columnar(safe_results))
+            response = requests.post(
+                f"{db_url}{results_path}",
+                data=json.dumps(columnar_payload, separators=(",", ":")),
+                headers={"Content-Type": COLUMNAR_CONTENT_TYPE}
+            )
+            if response.status_code in (400, 415):
+                # Receiver does not understand the columnar encoding; resend as rows
+                print(f"Columnar payload rejected ({response.status_code}), falling back to JSON rows")
+                response = None
+        if response is None:
+            response = requests.post(
+                f"{db_url}{results_path}",
+                json=payload,
+                headers={"Content-Type": "application/json"}
+            )
         print(response.json())
         response.raise_for_status()
         print(f"Successfully sent results to database. Status: {response.status_code}")
@@ -90,19 +255,247 @@ def send_results_to_db(results):
         print(f"Error sending results to database: {str(e)}")
         raise
 
+# describe_* filter that selects resources by ID, used by targeted scans
+TARGET_ID_FILTERS = {
+    "ec2": "instance-id",
+    "vpc": "vpc-id",
+    "subnet": "subnet-id",
+    "security_group": "group-id",
+    "route_table": "route-table-id",
+    "internet_gateway": "internet-gateway-id",
+    "nat_gateway": "nat-gateway-id",
+    "network_acl": "network-acl-id",
+    "elastic_ip": "allocation-id",
+    "transit_gateway": "transit-gateway-id"
+}
+
+# Resource ID prefix for each resource type a targeted scan can refresh
+TARGET_ID_PREFIXES = {
+    "i-": "ec2",
+    "vpc-": "vpc",
+    "subnet-": "subnet",
+    "sg-": "security_group",
+    "rtb-": "route_table",
+    "igw-": "internet_gateway",
+    "nat-": "nat_gateway",
+    "acl-": "network_acl",
+    "eipalloc-": "elastic_ip",
+    "tgw-": "transit_gateway"
+}
+
+def filter_kwargs(config, resource_type, param="Filters"):
+    """Server-side filters declared under "filters" in the config for a describe_* call.
+
+    Targeted scans also list resource IDs under "ids"; these become an ID filter,
+    which unlike the *Ids parameters does not fail on resources deleted since.
+    """
+    filters = list(config.get("filters", {}).get(resource_type) or [])
+    ids = config.get("ids", {}).get(resource_type)
+    if ids:
+        filters.append({"Name": TARGET_ID_FILTERS[resource_type], "Values": ids})
+    return {param: filters} if filters else {}
+
+# Metadata that is the same for every account (public AMIs) is kept across
+# scans in METADATA_CACHE_DIR, ideally a shared volume
+METADATA_CACHE_TTL = int(os.getenv("METADATA_CACHE_TTL", str(24 * 60 * 60)))
+METADATA_CACHE_MAX_ENTRIES = int(os.getenv("METADATA_CACHE_MAX_ENTRIES", "10000"))
+
+class MetadataCache:
+    """JSON file cache with a TTL per entry and least-recently-used eviction."""
+
+    def __init__(self, path, ttl, max_entries):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = self._read()
+        self._dirty = False
+
+    def _read(self):
+        try:
+            with open(self.path, "r") as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return {}
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.time() - entry["storedAt"] > self.ttl:
+                return None
+            # Access times drive eviction, so they have to be written back too
+            entry["usedAt"] = time.time()
+            self._dirty = True
+            return entry["value"]
+
+    def set(self, key, value):
+        with self._lock:
+            now = time.time()
+            self._entries[key] = {"value": value, "storedAt": now, "usedAt": now}
+            self._dirty = True
+
+    def save(self):
+        """Merges with what other scans wrote since, evicts, and writes atomically."""
+        with self._lock:
+            if not self._dirty:
+                return
+            entries = self._read()
+            for key, entry in self._entries.items():
+                if key not in entries:
+                    entries[key] = entry
+                    continue
+                used_at = max(entries[key]["usedAt"], entry["usedAt"])
+                if entries[key]["storedAt"] <= entry["storedAt"]:
+                    entries[key] = entry
+                entries[key]["usedAt"] = used_at
+            now = time.time()
+            entries = {k: v for k, v in entries.items() if now - v["storedAt"] <= self.ttl}
+            if len(entries) > self.max_entries:
+                newest = sorted(entries, key=lambda k: entries[k]["usedAt"], reverse=True)[:self.max_entries]
+                entries = {k: entries[k] for k in newest}
+
+            tmp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            try:
+                with open(tmp_path, "w") as file:
+                    json.dump(entries, file)
+                os.replace(tmp_path, self.path)
+            except OSError as e:
+                print(f"Could not write metadata cache: {str(e)}")
+                return
+            self._entries = entries
+            self._dirty = False
+
+_metadata_cache = None
+_metadata_cache_lock = threading.Lock()
+
+def get_metadata_cache():
+    """Process-wide metadata cache, or None when METADATA_CACHE_DIR is not set."""
+    global _metadata_cache
+    cache_dir = os.getenv("METADATA_CACHE_DIR")
+    if not cache_dir:
+        return None
+    with _metadata_cache_lock:
+        if _metadata_cache is None:
+            os.makedirs(cache_dir, exist_ok=True)
+            _metadata_cache = MetadataCache(
+                os.path.join(cache_dir, "metadata_cache.json"),
+                METADATA_CACHE_TTL,
+                METADATA_CACHE_MAX_ENTRIES
+            )
+        return _metadata_cache
+
+def lookup_images(ec2_client, image_ids):
+    """Describes AMIs by ID, serving public AMIs from the metadata cache.
+
+    Private AMIs are customer-owned and may change hands, so they are always fetched.
+    """
+    cache = get_metadata_cache()
+    region = ec2_client.meta.region_name
+    images = {}
+    missing = []
+    for image_id in image_ids:
+        cached = cache.get(f"ami:{region}:{image_id}") if cache else None
+        if cached is not None:
+            images[image_id] = cached
+        else:
+            missing.append(image_id)
+
+    for batch in chunked(missing, 100):
+        try:
+            described = ec2_client.describe_images(ImageIds=batch)["Images"]
+        except ec2_client.exceptions.ClientError:
+            # One deregistered AMI fails the whole batch; retry the IDs one by one
+            described = []
+            for image_id in batch if len(batch) > 1 else []:
+                try:
+                    described.extend(ec2_client.describe_images(ImageIds=[image_id])["Images"])
+                except ec2_client.exceptions.ClientError:
+                    continue
+        for image in described:
+            images[image["ImageId"]] = image
+            if cache and image.get("Public"):
+                cache.set(f"ami:{region}:{image['ImageId']}", image)
+
+    if cache:
+        cache.save()
+    return images
+
+# PARTITIONED_SCAN=1 walks the largest EC2 listings in per-VPC slices in parallel
+PARTITIONED_SCAN = os.getenv("PARTITIONED_SCAN") == "1"
+PARTITION_WORKERS = int(os.getenv("PARTITION_WORKERS", "8"))
+
+def use_partitions(config):
+    # Targeted scans already narrow the call to a handful of IDs
+    return PARTITIONED_SCAN and not config.get("ids")
+
+def list_vpc_ids(session):
+    """Lists every VPC ID once per scan; the partitioned collectors share it."""
+    def load():
+        vpc_ids = []
+        for page in session.client("ec2").get_paginator("describe_vpcs").paginate():
+            vpc_ids.extend(vpc["VpcId"] for vpc in page["Vpcs"])
+        return vpc_ids
+    return session.shared("vpc_ids", load)
+
+def describe_partitioned(session, config, resource_type, operation, extract, id_key, vpcless_filter=None):
+    """Walks a describe_* listing as one vpc-id filtered slice per VPC, in parallel.
+
+    Resources that can exist without a VPC are picked up by one more slice
+    filtered on vpcless_filter, keeping only the items that report no VpcId.
+    Slices are merged in order and deduplicated on id_key.
+    """
+    ec2_client = session.client("ec2")
+    filters = filter_kwargs(config, resource_type).get("Filters", [])
+    slices = [{"Name": "vpc-id", "Values": [vpc_id]} for vpc_id in list_vpc_ids(session)]
+    if vpcless_filter:
+        slices.append(vpcless_filter)
+    if not slices:
+        return []
+
+    def walk(slice_filter):
+        items = []
+        for page in ec2_client.get_paginator(operation).paginate(Filters=filters + [slice_filter]):
+            items.extend(extract(page))
+        if slice_filter is vpcless_filter:
+            items = [item for item in items if not item.get("VpcId")]
+        return items
+
+    merged = {}
+    with ThreadPoolExecutor(max_workers=min(PARTITION_WORKERS, len(slices))) as pool:
+        for items in pool.map(walk, slices):
+            for item in items:
+                merged.setdefault(item[id_key], item)
+    return list(merged.values())
+
 def get_ec2_instances(session, config):
     """Retrieves EC2 instances based on the configured properties."""
     ec2_client = session.client("ec2")
-    instances = ec2_client.describe_instances()["Reservations"]
+    if use_partitions(config):
+        # Reservations can span VPCs, so slices are merged per instance
+        partitioned = describe_partitioned(
+            session, config, "ec2", "describe_instances",
+            lambda page: [instance for res in page["Reservations"] for instance in res["Instances"]],
+            "InstanceId",
+            # Terminated and terminating instances no longer report a VpcId
+            vpcless_filter={"Name": "instance-state-name", "Values": ["shutting-down", "terminated"]}
+        )
+        instances = [{"Instances": partitioned}]
+    else:
+        instances = ec2_client.describe_instances(**filter_kwargs(config, "ec2"))["Reservations"]
+    images = {}
+    if "Image" in config.get("ec2", []):
+        # Each distinct AMI is described once, in batches, rather than once per instance
+        image_ids = {instance["ImageId"] for res in instances for instance in res["Instances"] if instance.get("ImageId")}
+        images = lookup_images(ec2_client, sorted(image_ids))
+
     results = []
     for res in instances:
         for instance in res["Instances"]:
             instance_data = {}
             for prop in config.get("ec2", []):
                 if prop == "Image":
-                    image_id = instance.get("ImageId")
-                    if image_id:
-                        image = ec2_client.describe_images(ImageIds=[image_id])["Images"][0]
+                    image = images.get(instance.get("ImageId"))
+                    if image:
                         instance_data["ImageId"] = image.get("ImageId")
                         instance_data["ImageName"] = image.get("Name")
                         instance_data["ImageDescription"] = image.get("Description")
@@ -115,7 +508,7 @@ def get_ec2_instances(session, config):
 def get_vpcs(session, config):
     """Retrieves VPCs based on the configured properties."""
     ec2_client = session.client("ec2")
-    vpcs = ec2_client.describe_vpcs()["Vpcs"]
+    vpcs = ec2_client.describe_vpcs(**filter_kwargs(config, "vpc"))["Vpcs"]
     return [
         {
             prop: vpc.get(prop, None)
@@ -127,7 +520,7 @@ def get_vpcs(session, config):
 def get_subnets(session, config):
     """Retrieves subnets based on the configured properties."""
     ec2_client = session.client("ec2")
-    subnets = ec2_client.describe_subnets()["Subnets"]
+    subnets = ec2_client.describe_subnets(**filter_kwargs(config, "subnet"))["Subnets"]
     return [
         {
             prop: subnet.get(prop, None)
@@ -139,7 +532,13 @@ def get_subnets(session, config):
 def get_security_groups(session, config):
     """Retrieves security groups based on the configured properties."""
     ec2_client = session.client("ec2")
-    security_groups = ec2_client.describe_security_groups()["SecurityGroups"]
+    if use_partitions(config):
+        security_groups = describe_partitioned(
+            session, config, "security_group", "describe_security_groups",
+            lambda page: page["SecurityGroups"], "GroupId"
+        )
+    else:
+        security_groups = ec2_client.describe_security_groups(**filter_kwargs(config, "security_group"))["SecurityGroups"]
     
     results = []
     for sg in security_groups:
@@ -170,7 +569,7 @@ def get_s3_buckets(session, config):
 def get_route_tables(session, config):
     """Retrieves route tables based on the configured properties."""
     ec2_client = session.client("ec2")
-    route_tables = ec2_client.describe_route_tables()["RouteTables"]
+    route_tables = ec2_client.describe_route_tables(**filter_kwargs(config, "route_table"))["RouteTables"]
     return [
         {
             prop: rt.get(prop, None)
@@ -182,7 +581,7 @@ def get_route_tables(session, config):
 def get_internet_gateways(session, config):
     """Retrieves internet gateways based on the configured properties."""
     ec2_client = session.client("ec2")
-    internet_gateways = ec2_client.describe_internet_gateways()["InternetGateways"]
+    internet_gateways = ec2_client.describe_internet_gateways(**filter_kwargs(config, "internet_gateway"))["InternetGateways"]
     return [
         {
             prop: igw.get(prop, None)
@@ -194,7 +593,7 @@ def get_internet_gateways(session, config):
 def get_nat_gateways(session, config):
     """Retrieves NAT gateways based on the configured properties."""
     ec2_client = session.client("ec2")
-    nat_gateways = ec2_client.describe_nat_gateways()["NatGateways"]
+    nat_gateways = ec2_client.describe_nat_gateways(**filter_kwargs(config, "nat_gateway", "Filter"))["NatGateways"]
     return [
         {
             prop: ngw.get(prop, None)
@@ -206,7 +605,13 @@ def get_nat_gateways(session, config):
 def get_network_acls(session, config):
     """Retrieves network ACLs based on the configured properties."""
     ec2_client = session.client("ec2")
-    network_acls = ec2_client.describe_network_acls()["NetworkAcls"]
+    if use_partitions(config):
+        network_acls = describe_partitioned(
+            session, config, "network_acl", "describe_network_acls",
+            lambda page: page["NetworkAcls"], "NetworkAclId"
+        )
+    else:
+        network_acls = ec2_client.describe_network_acls(**filter_kwargs(config, "network_acl"))["NetworkAcls"]
     return [
         {
             prop: acl.get(prop, None)
@@ -218,7 +623,7 @@ def get_network_acls(session, config):
 def get_elastic_ips(session, config):
     """Retrieves elastic IPs based on the configured properties."""
     ec2_client = session.client("ec2")
-    elastic_ips = ec2_client.describe_addresses()["Addresses"]
+    elastic_ips = ec2_client.describe_addresses(**filter_kwargs(config, "elastic_ip"))["Addresses"]
     return [
         {
             prop: eip.get(prop, None)
@@ -231,7 +636,7 @@ def get_transit_gateways(session, config):
     """Retrieves transit gateways based on the configured properties."""
     ec2_client = session.client("ec2")
     try:
-        transit_gateways = ec2_client.describe_transit_gateways()["TransitGateways"]
+        transit_gateways = ec2_client.describe_transit_gateways(**filter_kwargs(config, "transit_gateway"))["TransitGateways"]
         return [
             {
                 prop: tgw.get(prop, None)
@@ -243,10 +648,29 @@ def get_transit_gateways(session, config):
         # Transit Gateway might not be available in all regions
         return []
 
+def describe_target_load_balancers(elbv2_client, arns):
+    """Describes the given load balancers; deleted ones are left out instead of failing the call."""
+    try:
+        return elbv2_client.describe_load_balancers(LoadBalancerArns=arns)["LoadBalancers"]
+    except elbv2_client.exceptions.LoadBalancerNotFoundException:
+        pass
+    # At least one ARN is gone; describe them one at a time to keep the rest
+    load_balancers = []
+    for arn in arns:
+        try:
+            load_balancers.extend(elbv2_client.describe_load_balancers(LoadBalancerArns=[arn])["LoadBalancers"])
+        except elbv2_client.exceptions.LoadBalancerNotFoundException:
+            continue
+    return load_balancers
+
 def get_load_balancers(session, config):
     """Retrieves load balancers based on the configured properties."""
     elbv2_client = session.client("elbv2")
-    load_balancers = elbv2_client.describe_load_balancers()["LoadBalancers"]
+    target_arns = config.get("ids", {}).get("load_balancer")
+    if target_arns:
+        load_balancers = describe_target_load_balancers(elbv2_client, target_arns)
+    else:
+        load_balancers = elbv2_client.describe_load_balancers()["LoadBalancers"]
     return [
         {
             prop: lb.get(prop, None)
@@ -255,14 +679,42 @@ def get_load_balancers(session, config):
         for lb in load_balancers
     ]
 
+# describe_clusters and describe_tasks accept at most 100 ARNs per call
+ECS_BATCH_SIZE = 100
+ECS_MAX_WORKERS = int(os.getenv("ECS_MAX_WORKERS", "8"))
+
+def chunked(items, size):
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+def list_ecs_clusters(session):
+    """Lists every ECS cluster ARN once per scan; both ECS collectors share it."""
+    def load():
+        ecs_client = session.client("ecs")
+        cluster_arns = []
+        for page in ecs_client.get_paginator("list_clusters").paginate():
+            cluster_arns.extend(page["clusterArns"])
+        return cluster_arns
+    return session.shared("ecs_cluster_arns", load)
+
+def describe_cluster_tasks(ecs_client, cluster_arn):
+    """Pages through a cluster's tasks and describes them in batches."""
+    tasks = []
+    for page in ecs_client.get_paginator("list_tasks").paginate(cluster=cluster_arn):
+        for batch in chunked(page["taskArns"], ECS_BATCH_SIZE):
+            tasks.extend(ecs_client.describe_tasks(cluster=cluster_arn, tasks=batch)["tasks"])
+    return tasks
+
 def get_ecs_clusters(session, config):
     """Retrieves ECS clusters based on the configured properties."""
     ecs_client = session.client("ecs")
-    cluster_arns = ecs_client.list_clusters()["clusterArns"]
+    cluster_arns = list_ecs_clusters(session)
     if not cluster_arns:
         return []
-    
-    clusters = ecs_client.describe_clusters(clusters=cluster_arns)["clusters"]
+
+    batches = chunked(cluster_arns, ECS_BATCH_SIZE)
+    with ThreadPoolExecutor(max_workers=min(ECS_MAX_WORKERS, len(batches))) as pool:
+        described = pool.map(lambda batch: ecs_client.describe_clusters(clusters=batch)["clusters"], batches)
+        clusters = [cluster for batch in described for cluster in batch]
     return [
         {
             prop: cluster.get(prop, None)
@@ -274,26 +726,22 @@ def get_ecs_clusters(session, config):
 def get_ecs_tasks(session, config):
     """Retrieves ECS tasks based on the configured properties."""
     ecs_client = session.client("ecs")
-    cluster_arns = ecs_client.list_clusters()["clusterArns"]
+    cluster_arns = list_ecs_clusters(session)
     if not cluster_arns:
         return []
-    
-    tasks = []
-    for cluster_arn in cluster_arns:
-        task_arns = ecs_client.list_tasks(cluster=cluster_arn)["taskArns"]
-        if not task_arns:
-            continue
-            
-        cluster_tasks = ecs_client.describe_tasks(cluster=cluster_arn, tasks=task_arns)["tasks"]
-        tasks.extend([
-            {
-                prop: task.get(prop, None)
-                for prop in config.get("ecs_task", [])
-            }
-            for task in cluster_tasks
-        ])
-    
-    return tasks
+
+    # Clusters are independent, so walk them concurrently
+    with ThreadPoolExecutor(max_workers=min(ECS_MAX_WORKERS, len(cluster_arns))) as pool:
+        cluster_tasks = pool.map(lambda cluster_arn: describe_cluster_tasks(ecs_client, cluster_arn), cluster_arns)
+        tasks = [task for batch in cluster_tasks for task in batch]
+
+    return [
+        {
+            prop: task.get(prop, None)
+            for prop in config.get("ecs_task", [])
+        }
+        for task in tasks
+    ]
 
 def get_lambda_functions(session, config):
     """Retrieves Lambda functions based on the configured properties."""
@@ -331,10 +779,19 @@ def get_iam_users(session, config):
         for user in users
     ]
 
+def list_all_policies(iam_client, **kwargs):
+    policies = []
+    for page in iam_client.get_paginator("list_policies").paginate(**kwargs):
+        policies.extend(page["Policies"])
+    return policies
+
 def get_iam_policies(session, config):
-    """Retrieves IAM policies based on the configured properties."""
+    """Retrieves the AWS-managed policies attached in the account and all customer-managed ones."""
     iam_client = session.client("iam")
-    policies = iam_client.list_policies()["Policies"]
+    policies = (
+        list_all_policies(iam_client, Scope="AWS", OnlyAttached=True)
+        + list_all_policies(iam_client, Scope="Local")
+    )
     return [
         {
             prop: policy.get(prop, None)
@@ -357,37 +814,357 @@ def load_config():
         "s3": ["Name", "CreationDate"]
     }
 
+# Result key, config key and collector for every supported resource type
+COLLECTORS = [
+    ("instances", "ec2", get_ec2_instances),
+    ("vpcs", "vpc", get_vpcs),
+    ("subnets", "subnet", get_subnets),
+    ("security_groups", "security_group", get_security_groups),
+    ("s3_buckets", "s3", get_s3_buckets),
+    ("route_tables", "route_table", get_route_tables),
+    ("internet_gateways", "internet_gateway", get_internet_gateways),
+    ("nat_gateways", "nat_gateway", get_nat_gateways),
+    ("network_acls", "network_acl", get_network_acls),
+    ("elastic_ips", "elastic_ip", get_elastic_ips),
+    ("transit_gateways", "transit_gateway", get_transit_gateways),
+    ("load_balancers", "load_balancer", get_load_balancers),
+    ("ecs_clusters", "ecs_cluster", get_ecs_clusters),
+    ("ecs_tasks", "ecs_task", get_ecs_tasks),
+    ("lambda_functions", "lambda_function", get_lambda_functions),
+    ("iam_roles", "iam_role", get_iam_roles),
+    ("iam_users", "iam_user", get_iam_users),
+    ("iam_policies", "iam_policy", get_iam_policies)
+]
+
+def run_collector(session, config, result_key, config_key, collector):
+    # Collectors with no configured properties would only return empty dicts
+    if not config.get(config_key):
+        return []
+    with profiled(f"collect {result_key}"):
+        return collector(session, config)
+
+def run_scan(session, config):
+    """Runs the collectors enabled in the config and returns the combined results."""
+    return {
+        result_key: run_collector(session, config, result_key, config_key, collector)
+        for result_key, config_key, collector in COLLECTORS
+    }
+
+def group_target_ids(resource_ids):
+    """Groups resource IDs and ARNs by config key; returns them with the unsupported ones."""
+    ids_by_type = {}
+    unsupported = []
+    for resource_id in resource_ids:
+        if resource_id.startswith("arn:") and ":elasticloadbalancing:" in resource_id and ":loadbalancer/" in resource_id:
+            ids_by_type.setdefault("load_balancer", []).append(resource_id)
+            continue
+        if resource_id.startswith("arn:") and ":ec2:" in resource_id:
+            # arn:aws:ec2:<region>:<account>:<type>/<id>
+            resource_id = resource_id.rsplit("/", 1)[-1]
+        config_key = next((key for prefix, key in TARGET_ID_PREFIXES.items() if resource_id.startswith(prefix)), None)
+        if config_key:
+            ids_by_type.setdefault(config_key, []).append(resource_id)
+        else:
+            unsupported.append(resource_id)
+    return ids_by_type, unsupported
+
+def run_targeted_scan(session, config, resource_ids):
+    """Describes only the given resources, one ID-filtered call per resource type.
+
+    Returns the results and the IDs that were actually scanned. IDs of types with
+    no configured properties are skipped, since an empty result for them would
+    read as the resources having been deleted.
+    """
+    ids_by_type, unsupported = group_target_ids(resource_ids)
+    for config_key in [key for key in ids_by_type if not config.get(key)]:
+        unsupported.extend(ids_by_type.pop(config_key))
+    if unsupported:
+        print(f"Skipping resource IDs that cannot be targeted: {', '.join(unsupported)}")
+
+    target_config = {key: config.get(key) for key in ids_by_type}
+    target_config["filters"] = config.get("filters", {})
+    target_config["ids"] = ids_by_type
+    results = {
+        result_key: run_collector(session, target_config, result_key, config_key, collector)
+        for result_key, config_key, collector in COLLECTORS
+        if config_key in ids_by_type
+    }
+    return results, [resource_id for ids in ids_by_type.values() for resource_id in ids]
+
+def get_spool_dir(user_id=None, connection_id=None):
+    """Spool directory for this scan, or None when SPOOL_DIR is not set."""
+    spool_root = os.getenv("SPOOL_DIR")
+    if not spool_root:
+        return None
+    user_id = user_id or os.getenv("userID")
+    connection_id = connection_id or os.getenv("CONNECTION_ID")
+    return os.path.join(spool_root, f"{user_id}_{connection_id}")
+
+# A checkpoint older than this is a stale picture of the account, not a resume point
+SPOOL_MAX_AGE = int(os.getenv("SPOOL_MAX_AGE", "3600"))
+
+def load_manifest(spool_dir, config):
+    """Loads the checkpoint manifest, starting over if the config changed or it is too old.
+
+    Starting over also removes the spool files of the discarded checkpoint.
+    """
+    config_hash = hashlib.sha256(json.dumps(config, sort_keys=True).encode()).hexdigest()
+    try:
+        with open(os.path.join(spool_dir, "manifest.json"), "r") as file:
+            manifest = json.load(file)
+        if manifest.get("configHash") == config_hash and time.time() - manifest.get("createdAt", 0) <= SPOOL_MAX_AGE:
+            return manifest
+        print("Discarding stale scan checkpoint")
+    except (OSError, ValueError):
+        pass
+
+    for name in os.listdir(spool_dir):
+        if name.endswith(".ndjson") or name.startswith("manifest.json"):
+            os.remove(os.path.join(spool_dir, name))
+    return {"configHash": config_hash, "createdAt": time.time(), "completed": []}
+
+def save_manifest(spool_dir, manifest):
+    # Write-then-rename so a crash never leaves a half-written manifest
+    manifest_path = os.path.join(spool_dir, "manifest.json")
+    with open(manifest_path + ".tmp", "w") as file:
+        json.dump(manifest, file)
+    os.replace(manifest_path + ".tmp", manifest_path)
+
+def spool_collector_output(spool_dir, result_key, resources):
+    """Writes one collector's resources to its NDJSON spool file, one per line."""
+    with open(os.path.join(spool_dir, f"{result_key}.ndjson"), "w") as file:
+        for resource in resources:
+            file.write(json.dumps(convert_datetime(resource)) + "\n")
+        file.flush()
+        os.fsync(file.fileno())
+
+def run_spooled_scan(session, config, spool_dir):
+    """Runs the collectors, spooling each one's output and skipping those already spooled."""
+    os.makedirs(spool_dir, exist_ok=True)
+    manifest = load_manifest(spool_dir, config)
+    for result_key, config_key, collector in COLLECTORS:
+        if result_key in manifest["completed"]:
+            print(f"Skipping {result_key}: already spooled")
+            continue
+        resources = run_collector(session, config, result_key, config_key, collector)
+        spool_collector_output(spool_dir, result_key, resources)
+        del resources
+        manifest["completed"].append(result_key)
+        save_manifest(spool_dir, manifest)
+
+def iter_spooled_payload(spool_dir, user_id, connection_id):
+    """Yields the upload payload piece by piece straight from the spool files."""
+    header = json.dumps({"userId": user_id, "connectionId": connection_id})
+    yield (header[:-1] + ', "data": {').encode()
+    for index, (result_key, _, _) in enumerate(COLLECTORS):
+        yield f'{", " if index else ""}{json.dumps(result_key)}: ['.encode()
+        with open(os.path.join(spool_dir, f"{result_key}.ndjson"), "rb") as file:
+            for line_number, line in enumerate(file):
+                yield (b"," if line_number else b"") + line.rstrip(b"\n")
+        yield b"]"
+    yield b"}}"
+
+def send_spool_to_db(spool_dir, user_id=None, connection_id=None):
+    """Streams a completed spool to the database controller without loading it whole."""
+    db_url, user_id, connection_id = resolve_upload_target(user_id, connection_id)
+    requests = lazy_import("requests")
+    try:
+        response = requests.post(
+            f"{db_url}/cloud-query-results",
+            data=iter_spooled_payload(spool_dir, user_id, connection_id),
+            headers={"Content-Type": "application/json"}
+        )
+        print(response.json())
+        response.raise_for_status()
+        print(f"Successfully sent results to database. Status: {response.status_code}")
+    except requests.exceptions.RequestException as e:
+        print(f"Error sending results to database: {str(e)}")
+        raise
+
+def run_job(job, config, botocore_session=None):
+    """Scans one account for a daemon job using only that job's credentials."""
+    credentials = {
+        "accessKeyId": decrypt(job["accessKeyId"]),
+        "secretAccessKey": decrypt(job["secretAccessKey"]),
+        # Only temporary credentials come with a session token
+        "sessionToken": decrypt(job["sessionToken"]) if job.get("sessionToken") else None,
+        "region": job.get("region")
+    }
+    session = get_aws_session(credentials, botocore_session)
+    if job.get("resourceIds"):
+        results, scanned_ids = run_targeted_scan(session, config, job["resourceIds"])
+        if scanned_ids:
+            send_results_to_db(results, job["userId"], job["connectionId"], scanned_ids)
+        return
+    results = run_scan(session, config)
+    send_results_to_db(results, job["userId"], job["connectionId"])
+
+def new_botocore_session(loader):
+    """Fresh botocore session that reuses an already warm service-model loader."""
+    session = lazy_import("botocore.session").Session()
+    session.register_component("data_loader", loader)
+    return session
+
+def run_daemon():
+    """Stays resident and runs scan jobs posted to the local HTTP endpoint."""
+    config = load_config()
+    workers = int(os.getenv("DAEMON_WORKERS", "4"))
+    port = int(os.getenv("DAEMON_PORT", "8080"))
+    host = os.getenv("DAEMON_HOST", "127.0.0.1")
+    token = os.getenv("DAEMON_TOKEN")
+    max_queued = int(os.getenv("DAEMON_MAX_QUEUED", str(workers * 4)))
+    job_ttl = int(os.getenv("DAEMON_JOB_TTL", "3600"))
+    max_jobs = int(os.getenv("DAEMON_MAX_JOBS", "1000"))
+
+    # Jobs carry credentials and write into a user's graph, so anything beyond
+    # loopback must be authenticated
+    if host not in ("127.0.0.1", "localhost", "::1") and not token:
+        raise ValueError("DAEMON_TOKEN must be set when DAEMON_HOST is not a loopback address")
+
+    # Load the service models once; every job session shares this loader
+    warm_session = lazy_import("botocore.session").Session()
+    loader = warm_session.get_component("data_loader")
+    for service_name in ("ec2", "s3", "elbv2", "ecs", "lambda", "iam"):
+        warm_session.get_service_model(service_name)
+
+    executor = ThreadPoolExecutor(max_workers=workers)
+    jobs = {}
+    jobs_lock = threading.Lock()
+
+    def prune_jobs():
+        # Caller holds jobs_lock. Finished jobs are kept for job_ttl, and the
+        # oldest finished ones go first once there are more than max_jobs.
+        now = time.time()
+        finished = sorted(
+            (job["finishedAt"], job_id) for job_id, job in jobs.items() if "finishedAt" in job
+        )
+        excess = len(jobs) - max_jobs
+        for finished_at, job_id in finished:
+            if now - finished_at > job_ttl or excess > 0:
+                del jobs[job_id]
+                excess -= 1
+
+    def execute(job_id, job):
+        with jobs_lock:
+            jobs[job_id]["status"] = "running"
+        try:
+            run_job(job, config, new_botocore_session(loader))
+            status, error = "completed", None
+        except Exception as e:
+            status, error = "failed", str(e)
+            print(f"Job {job_id} failed: {error}")
+        with jobs_lock:
+            jobs[job_id].update({"status": status, "error": error, "finishedAt": time.time()})
+
+    class JobHandler(BaseHTTPRequestHandler):
+        def _reply(self, status, body):
+            payload = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def _authorized(self):
+            if not token:
+                return True
+            # Compared as bytes; compare_digest rejects non-ASCII str with TypeError
+            return hmac.compare_digest(self.headers.get("X-Worker-Token", "").encode(), token.encode())
+
+        def do_POST(self):
+            if self.path != "/jobs":
+                return self._reply(404, {"error": "Not found"})
+            if not self._authorized():
+                return self._reply(401, {"error": "Unauthorized"})
+            try:
+                job = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+            except ValueError:
+                return self._reply(400, {"error": "Invalid JSON"})
+            missing = [k for k in ("userId", "connectionId", "accessKeyId", "secretAccessKey") if not job.get(k)]
+            if missing:
+                return self._reply(400, {"error": f"Missing required fields: {', '.join(missing)}"})
+            resource_ids = job.get("resourceIds")
+            if resource_ids is not None and not (
+                isinstance(resource_ids, list) and all(isinstance(resource_id, str) for resource_id in resource_ids)
+            ):
+                return self._reply(400, {"error": "resourceIds must be a list of strings"})
+
+            job_id = uuid.uuid4().hex
+            with jobs_lock:
+                prune_jobs()
+                queued = sum(1 for queued_job in jobs.values() if queued_job["status"] == "queued")
+                if queued >= max_queued:
+                    self.send_response(429)
+                    self.send_header("Retry-After", "5")
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                jobs[job_id] = {"status": "queued", "submittedAt": time.time()}
+            executor.submit(execute, job_id, job)
+            self._reply(202, {"jobId": job_id, "status": "queued"})
+
+        def do_GET(self):
+            if self.path == "/health":
+                return self._reply(200, {"status": "ok"})
+            if not self._authorized():
+                return self._reply(401, {"error": "Unauthorized"})
+            job_id = self.path[len("/jobs/"):] if self.path.startswith("/jobs/") else None
+            with jobs_lock:
+                job = dict(jobs[job_id]) if job_id in jobs else None
+            if job is None:
+                return self._reply(404, {"error": "Job not found"})
+            self._reply(200, {"jobId": job_id, **job})
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), JobHandler)
+    print(f"Query worker listening on {host}:{port} with {workers} workers")
+    server.serve_forever()
+
 def main():
     # Decrypt credentials before starting
     setup_credentials()
    
 
-    session = get_aws_session()
+    with profiled("build session"):
+        session = get_aws_session()
     config = load_config()
-    
-    results = {
-        "instances": get_ec2_instances(session, config),
-        "vpcs": get_vpcs(session, config),
-        "subnets": get_subnets(session, config),
-        "security_groups": get_security_groups(session, config),
-        "s3_buckets": get_s3_buckets(session, config),
-        "route_tables": get_route_tables(session, config),
-        "internet_gateways": get_internet_gateways(session, config),
-        "nat_gateways": get_nat_gateways(session, config),
-        "network_acls": get_network_acls(session, config),
-        "elastic_ips": get_elastic_ips(session, config),
-        "transit_gateways": get_transit_gateways(session, config),
-        "load_balancers": get_load_balancers(session, config),
-        "ecs_clusters": get_ecs_clusters(session, config),
-        "ecs_tasks": get_ecs_tasks(session, config),
-        "lambda_functions": get_lambda_functions(session, config),
-        "iam_roles": get_iam_roles(session, config),
-        "iam_users": get_iam_users(session, config),
-        "iam_policies": get_iam_policies(session, config)
-    }
-    
+
+    if os.getenv("STARTUP_BENCHMARK") == "1":
+        # Cold-start benchmark: one cheap call, report, and skip the scan
+        session.client("sts").get_caller_identity()
+        print_startup_profile()
+        return
+
+    target_ids = os.getenv("TARGET_RESOURCE_IDS")
+    if target_ids:
+        # Targeted rescan: refresh only the listed resources and post a partial update
+        resource_ids = [resource_id.strip() for resource_id in target_ids.split(",") if resource_id.strip()]
+        results, scanned_ids = run_targeted_scan(session, config, resource_ids)
+        if scanned_ids:
+            send_results_to_db(results, resource_ids=scanned_ids)
+        return
+
+    spool_dir = get_spool_dir()
+    if spool_dir:
+        # Spooled scan: a re-run resumes after the last completed collector
+        run_spooled_scan(session, config, spool_dir)
+        if STARTUP_PROFILE:
+            print_startup_profile()
+        send_spool_to_db(spool_dir)
+        shutil.rmtree(spool_dir, ignore_errors=True)
+        return
+
+    results = run_scan(session, config)
+    if STARTUP_PROFILE:
+        print_startup_profile()
+
     # Send results to database instead of printing
     send_results_to_db(results)
 
 if __name__ == "__main__":
-    main()
+    if os.getenv("QUERY_MODE") == "daemon":
+        run_daemon()
+    else:
+        main()
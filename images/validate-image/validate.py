@@ -1,5 +1,20 @@
 import boto3
 import os
+import sys
+import json
+import time
+import hashlib
+from botocore.config import Config
+from concurrent.futures import ThreadPoolExecutor
+
+# Batch mode settings
+MAX_WORKERS = int(os.environ.get('VALIDATE_MAX_WORKERS', '8'))
+CALL_TIMEOUT = int(os.environ.get('VALIDATE_CALL_TIMEOUT', '5'))
+# Positive results are only cached when VALIDATE_CACHE_PATH points at a file on
+# a volume mounted into every validator container; the container's own
+# filesystem is thrown away after each run.
+CACHE_PATH = os.environ.get('VALIDATE_CACHE_PATH')
+CACHE_TTL = int(os.environ.get('VALIDATE_CACHE_TTL', '300'))
 
 def get_aws_identity():
     # Fetch credentials from environment variables
@@ -17,5 +32,133 @@ def get_aws_identity():
     identity = sts_client.get_caller_identity()
     print("AWS Caller Identity:", identity)
 
+def decrypt(encrypted_text):
+    """Decrypts a value encrypted by the dbService (AES-256-CBC, "iv:data" hex)."""
+    from Crypto.Cipher import AES
+    from Crypto.Util.Padding import unpad
+
+    encryption_key = os.environ.get('ENCRYPTION_KEY')
+    if not encryption_key:
+        raise ValueError("ENCRYPTION_KEY environment variable is not set")
+
+    key = hashlib.sha256(encryption_key.encode()).digest()
+    iv_hex, encrypted_hex = encrypted_text.split(':')
+    cipher = AES.new(key, AES.MODE_CBC, bytes.fromhex(iv_hex))
+    return unpad(cipher.decrypt(bytes.fromhex(encrypted_hex)), AES.block_size).decode()
+
+def credential_fingerprint(access_key, secret_key, session_token=None):
+    """Cache key for a set of credentials; the secrets themselves are never stored."""
+    return hashlib.sha256(f"{access_key}:{secret_key}:{session_token or ''}".encode()).hexdigest()
+
+def read_cache_file():
+    try:
+        with open(CACHE_PATH, "r") as file:
+            cache = json.load(file)
+    except (OSError, ValueError):
+        return {}
+    now = time.time()
+    return {k: v for k, v in cache.items() if now - v["validatedAt"] < CACHE_TTL}
+
+def load_cache():
+    """Loads positive results that are still within their TTL."""
+    if not CACHE_PATH:
+        return {}
+    return read_cache_file()
+
+def save_cache(cache):
+    """Merges with what other validators wrote since, then replaces the file atomically."""
+    if not CACHE_PATH:
+        return
+    merged = read_cache_file()
+    for fingerprint, entry in cache.items():
+        if fingerprint not in merged or merged[fingerprint]["validatedAt"] <= entry["validatedAt"]:
+            merged[fingerprint] = entry
+
+    tmp_path = f"{CACHE_PATH}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "w") as file:
+            json.dump(merged, file)
+        os.replace(tmp_path, CACHE_PATH)
+    except OSError as e:
+        print(f"Could not write validation cache: {str(e)}", file=sys.stderr)
+
+def validate_connection(connection, cache):
+    """Verifies one encrypted connection and returns its result as a dict."""
+    connection_id = connection.get("id") or connection.get("_id")
+    started = time.time()
+    try:
+        credentials = connection["credentials"]
+        access_key = decrypt(credentials["accessKeyId"])
+        secret_key = decrypt(credentials["secretAccessKey"])
+        # Temporary credentials also carry an (encrypted) session token
+        session_token = decrypt(credentials["sessionToken"]) if credentials.get("sessionToken") else None
+        fingerprint = credential_fingerprint(access_key, secret_key, session_token)
+
+        if fingerprint in cache:
+            return {
+                "connectionId": connection_id,
+                "valid": True,
+                "identity": cache[fingerprint]["identity"],
+                "cached": True,
+                "elapsedMs": round((time.time() - started) * 1000, 1)
+            }
+
+        # Each worker builds its own session; the default boto3 session is not thread-safe
+        sts_client = boto3.session.Session().client(
+            'sts',
+            aws_access_key_id=access_key,
+            aws_secret_access_key=secret_key,
+            aws_session_token=session_token,
+            region_name=credentials.get("region") or "us-east-1",
+            config=Config(
+                connect_timeout=CALL_TIMEOUT,
+                read_timeout=CALL_TIMEOUT,
+                retries={"max_attempts": 1}
+            )
+        )
+        identity = sts_client.get_caller_identity()
+        identity = {k: identity[k] for k in ("UserId", "Account", "Arn")}
+        cache[fingerprint] = {"identity": identity, "validatedAt": time.time()}
+
+        return {
+            "connectionId": connection_id,
+            "valid": True,
+            "identity": identity,
+            "cached": False,
+            "elapsedMs": round((time.time() - started) * 1000, 1)
+        }
+    except Exception as e:
+        return {
+            "connectionId": connection_id,
+            "valid": False,
+            "error": str(e),
+            "cached": False,
+            "elapsedMs": round((time.time() - started) * 1000, 1)
+        }
+
+def validate_batch(connections):
+    """Verifies many connections concurrently on a bounded pool."""
+    cache = load_cache()
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
+        results = list(pool.map(lambda c: validate_connection(c, cache), connections))
+    save_cache(cache)
+    return results
+
+def run_batch():
+    # Connections come from a mounted file, or stdin when CONNECTIONS_PATH is "-"
+    connections_path = os.environ["CONNECTIONS_PATH"]
+    if connections_path == "-":
+        connections = json.load(sys.stdin)
+    else:
+        with open(connections_path, "r") as file:
+            connections = json.load(file)
+
+    results = validate_batch(connections)
+    json.dump({"results": results}, sys.stdout)
+    sys.stdout.write("\n")
+
 if __name__ == "__main__":
-    get_aws_identity()
+    if os.environ.get('CONNECTIONS_PATH'):
+        run_batch()
+    else:
+        get_aws_identity()
@@ -1,11 +1,16 @@
-from flask import Flask, Blueprint, request, jsonify
+from flask import Flask, Blueprint, Response, request, jsonify
 from functools import wraps
+import json
 import jwt
 import os
-from src.utils.data import get_remote_data
-from src.utils.exporter import generate_tf_resources
+from src.utils.data import get_remote_data, stream_remote_data
+from src.utils.exporter import generate_tf_resources_streaming
+from src.utils.sharding import generate_sharded_tf_resources
+from src.utils.batch import generate_tf_batch
+from src.utils.profiling import install_profiler, profile_store, require_profile_admin
 
 JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY', 'your-secret-key')
+TF_BATCH_MAX_ACCOUNTS = int(os.getenv('TF_BATCH_MAX_ACCOUNTS', '100'))
 
 def require_auth(f):
     @wraps(f)
@@ -30,17 +35,37 @@ def require_auth(f):
 
 # Create the IaC blueprint
 iac_bp = Blueprint('iac', __name__, url_prefix='/iac')
+install_profiler(iac_bp, exclude=('iac.iac_profiles', 'iac.iac_profile'))
 
 @iac_bp.route('/generate_tf', methods=['GET'])
 @require_auth
 def iac_gen_tf():
+    user_id = request.args.get('user_id')
+    account_id = request.args.get('account_id')
+    try:
+        # Parse and render the inventory section by section to bound memory
+        result = generate_tf_resources_streaming(stream_remote_data(user_id, account_id))
+
+        if result:
+            return jsonify(result)
+        return jsonify({
+            "status": "error",
+            "message": "No data found"
+        })
+    except RuntimeError as e:
+        return jsonify({"error": "Error Connection to db", "message": str(e)}), 500
+
+
+@iac_bp.route('/generate_tf/sharded', methods=['GET'])
+@require_auth
+def iac_gen_tf_sharded():
     user_id = request.args.get('user_id')
     account_id = request.args.get('account_id')
     try:
         data = get_remote_data(user_id, account_id)
 
         if data:
-            return jsonify(generate_tf_resources(data))
+            return jsonify(generate_sharded_tf_resources(data))
         return jsonify({
             "status": "error",
             "message": "No data found"
@@ -49,6 +74,41 @@ def iac_gen_tf():
         return jsonify({"error": "Error Connection to db", "message": str(e)}), 500
 
 
+@iac_bp.route('/generate_tf/batch', methods=['POST'])
+@require_auth
+def iac_gen_tf_batch():
+    body = request.get_json(silent=True) or {}
+    accounts = body.get('accounts')
+    if not isinstance(accounts, list) or not accounts:
+        return jsonify({"status": "error", "message": "accounts must be a non-empty list"}), 400
+    if len(accounts) > TF_BATCH_MAX_ACCOUNTS:
+        return jsonify({"status": "error", "message": f"At most {TF_BATCH_MAX_ACCOUNTS} accounts per batch"}), 400
+    if not all(isinstance(account, dict) and account.get('user_id') and account.get('account_id') for account in accounts):
+        return jsonify({"status": "error", "message": "Each account needs a user_id and an account_id"}), 400
+
+    # One JSON object per line, sent as soon as each account is done
+    results = (json.dumps(result) + '\n' for result in generate_tf_batch(accounts))
+    return Response(results, mimetype='application/x-ndjson')
+
+
+@iac_bp.route('/profiles', methods=['GET'])
+@require_profile_admin
+def iac_profiles():
+    return jsonify({"profiles": profile_store.summaries()})
+
+
+@iac_bp.route('/profiles/<profile_id>', methods=['GET'])
+@require_profile_admin
+def iac_profile(profile_id):
+    profile = profile_store.get(profile_id)
+    if not profile:
+        return jsonify({"status": "error", "message": "Profile not found"}), 404
+    if request.args.get('format') == 'raw':
+        return Response(profile['raw'], mimetype='application/octet-stream',
+                        headers={'Content-Disposition': f'attachment; filename={profile_id}.prof'})
+    return Response(profile['stats'], mimetype='text/plain')
+
+
 @iac_bp.route('/status', methods=['GET'])
 def iac_status():
     return jsonify({
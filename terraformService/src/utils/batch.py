@@ -0,0 +1,83 @@
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from src.utils.data import TF_FETCH_WORKERS, get_remote_data
+from src.utils.exporter import render_tf_sections
+from src.utils.workers import get_render_pool, replace_broken_render_pool
+
+
+def _timed_fetch(user_id, account_id):
+    start = time.perf_counter()
+    data = get_remote_data(user_id, account_id)
+    return data, time.perf_counter() - start
+
+
+def _timed_render(data):
+    # Runs in a render worker process, so it must stay a module-level function
+    start = time.perf_counter()
+    sections = render_tf_sections(data)
+    return sections, time.perf_counter() - start
+
+
+def _result(account, status, fetch_time=None, render_time=None, **fields):
+    return {
+        'user_id': account.get('user_id'),
+        'account_id': account.get('account_id'),
+        'status': status,
+        **fields,
+        'timing': {
+            'fetchMs': round(fetch_time * 1000, 1) if fetch_time is not None else None,
+            'renderMs': round(render_time * 1000, 1) if render_time is not None else None
+        }
+    }
+
+
+def generate_tf_batch(accounts):
+    """Yields one export per account, in completion order, with its own timing or error.
+
+    Inventories are fetched concurrently over the shared connection pool and
+    each one is handed to the shared render pool as soon as it arrives.
+    """
+    fetch_pool = ThreadPoolExecutor(max_workers=min(TF_FETCH_WORKERS, max(len(accounts), 1)))
+    render_pool = get_render_pool()
+    # Pool each render was submitted to, so a crash only replaces that pool
+    submitted_to = {}
+    pending = {
+        fetch_pool.submit(_timed_fetch, account.get('user_id'), account.get('account_id')): ('fetch', account, None)
+        for account in accounts
+    }
+    try:
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage, account, fetch_time = pending.pop(future)
+                future_pool = submitted_to.pop(future, None)
+                try:
+                    result, elapsed = future.result()
+                except BrokenProcessPool as e:
+                    # This account's render worker crashed; the rest go to a fresh pool
+                    render_pool = replace_broken_render_pool(future_pool)
+                    yield _result(account, 'error', fetch_time, message=str(e))
+                    continue
+                except Exception as e:
+                    yield _result(account, 'error', fetch_time, message=str(e))
+                    continue
+
+                if stage == 'fetch':
+                    if not result:
+                        yield _result(account, 'error', elapsed, message='No data found')
+                        continue
+                    try:
+                        render_future = render_pool.submit(_timed_render, result)
+                    except BrokenProcessPool:
+                        render_pool = replace_broken_render_pool(render_pool)
+                        render_future = render_pool.submit(_timed_render, result)
+                    pending[render_future] = ('render', account, elapsed)
+                    submitted_to[render_future] = render_pool
+                else:
+                    yield _result(account, 'ok', fetch_time, elapsed, data=result)
+    finally:
+        # The client may disconnect mid-stream; drop whatever has not started yet
+        for future in pending:
+            future.cancel()
+        fetch_pool.shutdown(wait=False)
@@ -0,0 +1,30 @@
+# Decoder for the column-oriented inventory encoding produced by the dbService
+# and the query image. Every resource type is a table of columns; string columns
+# (IDs, ARNs, names) point into one shared string table, and a column's optional
+# "missing" list names the rows that did not have that key at all.
+COLUMNAR_CONTENT_TYPE = 'application/vnd.aurora.columnar+json'
+COLUMNAR_FORMAT = 'columnar/1'
+
+
+def decode_columnar(payload):
+    """Rebuilds the row-oriented inventory exactly as it was encoded."""
+    if payload.get('format') != COLUMNAR_FORMAT:
+        raise ValueError(f"Unsupported columnar format: {payload.get('format')}")
+
+    strings = payload['strings']
+    data = {}
+    for resource_type, table in payload['tables'].items():
+        if 'rows' in table:
+            data[resource_type] = table['rows']
+            continue
+        rows = [{} for _ in range(table['count'])]
+        for column in table['columns']:
+            values = column['values']
+            if column['kind'] == 'str':
+                values = [None if value is None else strings[value] for value in values]
+            missing = set(column.get('missing', ()))
+            for index, (row, value) in enumerate(zip(rows, values)):
+                if index not in missing:
+                    row[column['name']] = value
+        data[resource_type] = rows
+    return data
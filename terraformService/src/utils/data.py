@@ -1,8 +1,18 @@
 import json 
+import codecs
 import requests
 import os
+from requests.adapters import HTTPAdapter
+from src.utils.columnar import COLUMNAR_CONTENT_TYPE, decode_columnar
 
 DB_SERVICE_URL = os.getenv('DB_SERVICE_URL', 'https://aurora-io.cs.colman.ac.il')
+TF_FETCH_WORKERS = int(os.getenv('TF_FETCH_WORKERS', '16'))
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# Keep-alive connection pool shared by every inventory fetch, sized for batch exports
+http_session = requests.Session()
+http_session.mount('http://', HTTPAdapter(pool_maxsize=TF_FETCH_WORKERS))
+http_session.mount('https://', HTTPAdapter(pool_maxsize=TF_FETCH_WORKERS))
 
 def load_mock_data(file_path="src/mock_aws_data1.json"):
     with open(file_path, "r") as file:
@@ -10,9 +20,107 @@ def load_mock_data(file_path="src/mock_aws_data1.json"):
 
 def get_remote_data(user_id, account_id):
     try:
-        response = requests.get(f'{DB_SERVICE_URL}/neo/tf-query-results/{user_id}/{account_id}')
+        response = http_session.get(
+            f'{DB_SERVICE_URL}/neo/tf-query-results/{user_id}/{account_id}',
+            headers={'Accept': f'{COLUMNAR_CONTENT_TYPE}, application/json'}
+        )
+        if response.headers.get('Content-Type', '').startswith(COLUMNAR_CONTENT_TYPE):
+            return decode_columnar(response.json())
         return response.json()
     except requests.exceptions.RequestException as e:
         raise RuntimeError(f"Request failed: {e}")
     # data = load_mock_data()
-    # return data
\ No newline at end of file
+    # return data
+
+
+def iter_json_sections(chunks):
+    """Yields (key, value) for each member of a top-level JSON object as soon as it is complete.
+
+    Only the section being parsed is held in memory; once yielded, its text is
+    dropped from the buffer.
+    """
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder('utf-8')()
+    chunks = iter(chunks)
+    buffer, pos = '', 0
+    # Next token: '{', 'first' (key or '}'), 'key', ':', 'value' or ',' (',' or '}')
+    expect = '{'
+    key = None
+    retry_at = 0
+    exhausted = False
+
+    while True:
+        while pos < len(buffer) and buffer[pos] in ' \t\n\r':
+            pos += 1
+
+        need_more = pos >= len(buffer)
+        if not need_more:
+            char = buffer[pos]
+            if expect == '{':
+                if char != '{':
+                    raise ValueError('Expected a JSON object')
+                pos += 1
+                expect = 'first'
+            elif expect in ('first', ',') and char == '}':
+                return
+            elif expect == ',':
+                if char != ',':
+                    raise ValueError('Expected "," or "}" in JSON object')
+                pos += 1
+                expect = 'key'
+            elif expect in ('first', 'key'):
+                try:
+                    key, pos = decoder.raw_decode(buffer, pos)
+                    expect = ':'
+                except json.JSONDecodeError:
+                    need_more = True
+            elif expect == ':':
+                if char != ':':
+                    raise ValueError('Expected ":" in JSON object')
+                pos += 1
+                expect = 'value'
+            elif len(buffer) < retry_at and not exhausted:
+                # Re-parsing a half-received section is costly, so wait for the buffer to double
+                need_more = True
+            else:
+                try:
+                    value, end = decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError:
+                    retry_at = len(buffer) * 2
+                    need_more = True
+                else:
+                    # A number cut at the end of the buffer may still be growing
+                    if not buffer[end:].strip() and not exhausted:
+                        need_more = True
+                    else:
+                        buffer, pos = buffer[end:], 0
+                        retry_at = 0
+                        expect = ','
+                        yield key, value
+                        del value
+
+        if need_more:
+            if exhausted:
+                raise ValueError('Truncated JSON response')
+            chunk = next(chunks, None)
+            if chunk is None:
+                exhausted = True
+                buffer += text_decoder.decode(b'', final=True)
+            else:
+                buffer += text_decoder.decode(chunk)
+
+
+def stream_remote_data(user_id, account_id):
+    """Streams an inventory from the dbService as (resource type, resources) pairs."""
+    try:
+        response = http_session.get(
+            f'{DB_SERVICE_URL}/neo/tf-query-results/{user_id}/{account_id}',
+            headers={'Accept': 'application/json'},
+            stream=True
+        )
+        with response:
+            yield from iter_json_sections(response.iter_content(chunk_size=STREAM_CHUNK_SIZE))
+    except requests.exceptions.RequestException as e:
+        raise RuntimeError(f"Request failed: {e}")
+    except ValueError as e:
+        raise RuntimeError(f"Invalid inventory response: {e}")
@@ -1,8 +1,7 @@
 from src.utils.tf_resources import generate_amis,generate_instances,generate_subnets,generate_vpcs,generate_security_groups,generate_s3_buckets,generate_route_tables,generate_internet_gateways,generate_network_acls,generate_load_balancers
 
-def generate_tf_resources(data):
-    print(data)
-    
+def render_tf_sections(data):
+    """Renders every resource type of an inventory into its Terraform source."""
     # Initialize all variables
     vpcs = ""
     subnets = ""
@@ -55,7 +54,7 @@ def generate_tf_resources(data):
     if data.get("loadBalancers") and len(data["loadBalancers"]) > 0:
         load_balancers = generate_load_balancers(data["loadBalancers"])
 
-    return {'data':{
+    return {
         'vpcs': vpcs,
         'subnets': subnets,
         'amis': amis,
@@ -66,4 +65,36 @@ def generate_tf_resources(data):
         'internetGateways': internet_gateways,
         'networkAcls': network_acls,
         'loadBalancers': load_balancers
-    }}
\ No newline at end of file
+    }
+
+
+# Generator for each inventory section; output keys match the input keys
+SECTION_GENERATORS = {
+    'vpcs': generate_vpcs,
+    'subnets': generate_subnets,
+    'amis': generate_amis,
+    'instances': generate_instances,
+    'securityGroupRules': generate_security_groups,
+    's3Buckets': generate_s3_buckets,
+    'routeTables': generate_route_tables,
+    'internetGateways': generate_internet_gateways,
+    'networkAcls': generate_network_acls,
+    'loadBalancers': generate_load_balancers
+}
+
+
+def generate_tf_resources_streaming(sections):
+    """Renders (resource type, resources) pairs as they arrive.
+
+    Each parsed section is released as soon as it is rendered, so only one
+    section of the input is alive at a time. Returns None if no section arrived.
+    """
+    rendered = {key: "" for key in SECTION_GENERATORS}
+    received = False
+    for key, resources in sections:
+        received = True
+        generator = SECTION_GENERATORS.get(key)
+        if generator and resources:
+            rendered[key] = generator(resources)
+        del resources
+    return {'data': rendered} if received else None
@@ -0,0 +1,114 @@
+import cProfile
+import hmac
+import io
+import marshal
+import os
+import pstats
+import random
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from functools import wraps
+from flask import g, jsonify, request
+
+# Profiling is off unless an admin token is configured; sampled profiles can
+# only be read with that token, so sampling alone does not enable it
+IAC_PROFILE_TOKEN = os.getenv('IAC_PROFILE_TOKEN')
+IAC_PROFILE_SAMPLE_RATE = float(os.getenv('IAC_PROFILE_SAMPLE_RATE', '0'))
+IAC_PROFILE_STORE_SIZE = int(os.getenv('IAC_PROFILE_STORE_SIZE', '50'))
+PROFILE_HEADER = 'X-Profile-Token'
+
+
+class ProfileStore:
+    """Keeps the most recent request profiles, evicting the oldest past max_size."""
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._profiles = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, profile):
+        with self._lock:
+            self._profiles[profile['id']] = profile
+            while len(self._profiles) > self.max_size:
+                self._profiles.popitem(last=False)
+
+    def get(self, profile_id):
+        with self._lock:
+            return self._profiles.get(profile_id)
+
+    def summaries(self):
+        with self._lock:
+            return [
+                {k: v for k, v in profile.items() if k not in ('stats', 'raw')}
+                for profile in reversed(self._profiles.values())
+            ]
+
+
+profile_store = ProfileStore(IAC_PROFILE_STORE_SIZE)
+
+
+def is_profile_admin():
+    token = request.headers.get(PROFILE_HEADER, '')
+    # compare_digest only accepts ASCII str, so compare bytes for arbitrary headers
+    return bool(IAC_PROFILE_TOKEN) and hmac.compare_digest(token.encode(), IAC_PROFILE_TOKEN.encode())
+
+
+def require_profile_admin(f):
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        if not is_profile_admin():
+            return jsonify({'message': 'Forbidden'}), 403
+        return f(*args, **kwargs)
+    return decorated
+
+
+def install_profiler(blueprint, exclude=()):
+    """Profiles a blueprint's requests on admin header or sampling; installs nothing without a token."""
+    if not IAC_PROFILE_TOKEN:
+        return
+
+    def start_profile():
+        if request.endpoint in exclude:
+            return
+        if is_profile_admin() or random.random() < IAC_PROFILE_SAMPLE_RATE:
+            g.profiler = cProfile.Profile()
+            g.profile_started = time.perf_counter()
+            g.profiler.enable()
+
+    def stop_profile(response):
+        profiler = g.pop('profiler', None)
+        if profiler is None:
+            return response
+        profiler.disable()
+
+        # Streamed responses finish after this point, so only the handler itself is covered
+        stats_text = io.StringIO()
+        stats = pstats.Stats(profiler, stream=stats_text)
+        stats.sort_stats('cumulative').print_stats(50)
+
+        profile_id = uuid.uuid4().hex
+        profile_store.add({
+            'id': profile_id,
+            'endpoint': request.endpoint,
+            'path': request.full_path,
+            'status': response.status_code,
+            'durationMs': round((time.perf_counter() - g.profile_started) * 1000, 1),
+            'createdAt': time.time(),
+            'stats': stats_text.getvalue(),
+            # Same format as cProfile's .prof files, for snakeviz/flameprof
+            'raw': marshal.dumps(stats.stats)
+        })
+        response.headers['X-Profile-Id'] = profile_id
+        return response
+
+    def discard_profile(exc):
+        # after_request is skipped on unhandled errors; never leave a profiler running
+        profiler = g.pop('profiler', None)
+        if profiler is not None:
+            profiler.disable()
+
+    blueprint.before_request(start_profile)
+    blueprint.after_request(stop_profile)
+    blueprint.teardown_request(discard_profile)
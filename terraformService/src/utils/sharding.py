@@ -0,0 +1,90 @@
+from concurrent.futures.process import BrokenProcessPool
+from src.utils.exporter import render_tf_sections
+from src.utils.workers import TF_RENDER_WORKERS, get_render_pool, replace_broken_render_pool
+
+# Shard that holds resources with no VPC of their own (S3 buckets, AMIs, ...)
+SHARED_SHARD = "shared"
+
+RESOURCE_TYPES = [
+    "vpcs", "subnets", "amis", "instances", "securityGroupRules", "s3Buckets",
+    "routeTables", "internetGateways", "networkAcls", "loadBalancers"
+]
+
+
+def shard_name(vpc_id):
+    """Module name used for the shard of a VPC, matching the aws_vpc resource name."""
+    return vpc_id.replace('-', '_')
+
+
+def _subnet_vpcs(data):
+    # Instances only link to their subnet, so resolve the VPC through it
+    subnet_vpcs = {}
+    for subnet in data.get("subnets") or []:
+        subnet_vpcs[subnet['name']] = subnet['vpc_name']
+        if subnet.get('subnetId'):
+            subnet_vpcs[subnet['subnetId']] = subnet['vpc_name']
+    return subnet_vpcs
+
+
+def _resource_vpc(resource_type, resource, subnet_vpcs):
+    """Returns the VPC a resource belongs to, or None for cross-shard resources."""
+    if resource_type == "vpcs":
+        return resource.get('vpcId', resource['name'])
+    if resource_type == "subnets":
+        return resource['vpc_name']
+    if resource_type == "instances":
+        return subnet_vpcs.get(resource['subnet_name'])
+    if resource_type == "securityGroupRules":
+        return resource['securityGroup']['properties'].get('vpcId')
+    if resource_type == "internetGateways":
+        attachments = resource.get('attachments') or []
+        return attachments[0]['vpcId'] if attachments else None
+    if resource_type in ("routeTables", "networkAcls", "loadBalancers"):
+        return resource.get('vpcId')
+    return None
+
+
+def partition_by_vpc(data):
+    """Splits an inventory into one inventory per VPC plus a shared one."""
+    subnet_vpcs = _subnet_vpcs(data)
+    shards = {}
+    for resource_type in RESOURCE_TYPES:
+        for resource in data.get(resource_type) or []:
+            vpc_id = _resource_vpc(resource_type, resource, subnet_vpcs)
+            name = shard_name(vpc_id) if vpc_id else SHARED_SHARD
+            shards.setdefault(name, {}).setdefault(resource_type, []).append(resource)
+    return shards
+
+
+def generate_root_module(shard_names):
+    """Root module wiring every shard in as a child module."""
+    root_content = ""
+    for name in shard_names:
+        root_content += f"""
+module "{name}" {{
+  source = "./{name}"
+}}
+"""
+    return root_content
+
+
+def generate_sharded_tf_resources(data):
+    """Renders each VPC shard as its own module, in parallel across workers."""
+    shards = partition_by_vpc(data)
+    names = sorted(shards)
+
+    if TF_RENDER_WORKERS > 1 and len(names) > 1:
+        pool = get_render_pool()
+        try:
+            rendered = list(pool.map(render_tf_sections, [shards[name] for name in names]))
+        except BrokenProcessPool:
+            # Retry once on a fresh pool; a second crash fails the request
+            pool = replace_broken_render_pool(pool)
+            rendered = list(pool.map(render_tf_sections, [shards[name] for name in names]))
+    else:
+        rendered = map(render_tf_sections, [shards[name] for name in names])
+
+    return {'data': {
+        'shards': dict(zip(names, rendered)),
+        'root': generate_root_module(names)
+    }}
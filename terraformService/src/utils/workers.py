@@ -0,0 +1,33 @@
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+# Rendering is pure-Python string building, so it runs in worker processes
+# rather than threads to actually use more than one core.
+TF_RENDER_WORKERS = int(os.getenv('TF_RENDER_WORKERS', os.cpu_count() or 1))
+
+_render_pool = None
+_render_pool_lock = threading.Lock()
+
+
+def get_render_pool():
+    """Returns the process pool shared by every request that renders Terraform."""
+    global _render_pool
+    with _render_pool_lock:
+        if _render_pool is None:
+            _render_pool = ProcessPoolExecutor(max_workers=TF_RENDER_WORKERS)
+        return _render_pool
+
+
+def replace_broken_render_pool(pool):
+    """Replaces a pool that raised BrokenProcessPool and returns the pool to use now.
+
+    A crashed worker breaks the whole pool. Requests that hit the same broken
+    pool concurrently all get the one replacement.
+    """
+    global _render_pool
+    with _render_pool_lock:
+        if _render_pool is pool:
+            pool.shutdown(wait=False)
+            _render_pool = ProcessPoolExecutor(max_workers=TF_RENDER_WORKERS)
+        return _render_pool